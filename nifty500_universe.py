@@ -84,3 +84,26 @@ NIFTY500_TICKERS = [
     "ALLCARGO.NS", "GATI.NS", "AEGISCHEM.NS", "GPPL.NS", "ADANIPORTS.NS", 
     "COCHINSHIP.NS", "MAZDOCK.NS", "GRSE.NS", "BEML.NS", "BEL.NS"
 ]
+
+# Known problematic tickers (delisted, renamed, bad data) excluded from every screen
+PROBLEMATIC_TICKERS = {
+    'CEAT.NS', 'PVR.NS', 'EQUITAS.NS', 'MINDTREE.NS', 'DRREDDYS.NS',
+    'INOXLEISUR.NS', 'JSW.NS', 'ALEMBICPH.NS', 'AARTI.NS', 'ZOMATO.NS',
+    'UJJIVAN.NS', 'DCB.NS', 'CARTRADETECH.NS', 'CADILAHC.NS', 'L&TFH.NS',
+    'VARUN.NS', 'ABBOTINDIA.NS', 'PHOENIXLTD.NS', 'TATAMOTORS.NS', 'NAVABREXIM.NS',
+    # Newly discovered delisted/bad data tickers
+    'NARAYANA.NS', 'PRISMCEM.NS', 'WELSPUNIND.NS', 'RAMSINFO.NS', 'ZENSAR.NS',
+    'INFOSYS.NS', 'IIFLWAM.NS', 'TATACHEMICALS.NS', 'TATACOFFEE.NS', 'BATA.NS',
+    'ADITYADK.NS', 'COX&KINGS.NS', 'HBLPOWER.NS', 'TECHNICALA.NS', 'AMARAJABAT.NS',
+    'BHARAT FORGE.NS', 'SONA.NS', 'SAMVARDHNA.NS', 'HINDWARE.NS', 'SWANENERGY.NS',
+    'ADANITRANS.NS', 'ORIENTGREEN.NS', 'WEBSOL.NS', 'BOROSIL.NS', 'ORIENTALCARB.NS',
+    'GATI.NS', 'AEGISCHEM.NS', 'VRL.NS', 'SIYARAM.NS', 'KPR.NS',
+    'FINOLEX.NS', 'RELAXOHOME.NS', 'KALPATPOWR.NS', 'CENTURYTEXT.NS', 'APTECH.NS',
+    'NIITTECH.NS', 'FIRSTSOURCE.NS', 'HEXAWARE.NS', 'BALRAMPUR.NS', 'DHAMPUR.NS',
+    'FINOLEXIND.NS',  # Additional bad ticker
+    # Additional bad tickers from expanded universe
+    'INDIHOTEL.NS', 'PEL.NS', 'ENGINEERSIN.NS', 'TV18BRDCST.NS', 'INFOE.NS'
+}
+
+# Universe shared by the live tool and the backtests
+FILTERED_UNIVERSE = [t for t in NIFTY500_TICKERS if t not in PROBLEMATIC_TICKERS]
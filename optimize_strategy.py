@@ -4,31 +4,19 @@ Enhanced Strategy Optimization
 Tests multiple strategy dimensions to maximize returns and minimize drawdowns
 """
 
+import numpy as np
 import pandas as pd
-import yfinance as yf
 from datetime import datetime
 
-# Use working universe from strategy_backtest
+from strategy_core import (
+    compute_panels, compute_scores, download_history, rebalance_schedule,
+    rebalance_step, run_sweep, top_n_indices,
+)
+
+# Shared filtered universe from nifty500_universe.py
 try:
-    from nifty500_universe import NIFTY500_TICKERS
-    # Filter out known problematic tickers
-    PROBLEMATIC = {
-        'CEAT.NS', 'PVR.NS', 'EQUITAS.NS', 'MINDTREE.NS', 'DRREDDYS.NS',
-        'INOXLEISUR.NS', 'JSW.NS', 'ALEMBICPH.NS', 'AARTI.NS', 'ZOMATO.NS',
-        'UJJIVAN.NS', 'DCB.NS', 'CARTRADETECH.NS', 'CADILAHC.NS', 'L&TFH.NS',
-        'VARUN.NS', 'ABBOTINDIA.NS', 'PHOENIXLTD.NS', 'TATAMOTORS.NS', 'NAVABREXIM.NS',
-        'NARAYANA.NS', 'PRISMCEM.NS', 'WELSPUNIND.NS', 'RAMSINFO.NS', 'ZENSAR.NS',
-        'INFOSYS.NS', 'IIFLWAM.NS', 'TATACHEMICALS.NS', 'TATACOFFEE.NS', 'BATA.NS',
-        'ADITYADK.NS', 'COX&KINGS.NS', 'HBLPOWER.NS', 'TECHNICALA.NS', 'AMARAJABAT.NS',
-        'BHARAT FORGE.NS', 'SONA.NS', 'SAMVARDHNA.NS', 'HINDWARE.NS', 'SWANENERGY.NS',
-        'ADANITRANS.NS', 'ORIENTGREEN.NS', 'WEBSOL.NS', 'BOROSIL.NS', 'ORIENTALCARB.NS',
-        'GATI.NS', 'AEGISCHEM.NS', 'VRL.NS', 'SIYARAM.NS', 'KPR.NS',
-        'FINOLEX.NS', 'RELAXOHOME.NS', 'KALPATPOWR.NS', 'CENTURYTEXT.NS', 'APTECH.NS',
-        'NIITTECH.NS', 'FIRSTSOURCE.NS', 'HEXAWARE.NS', 'BALRAMPUR.NS', 'DHAMPUR.NS',
-        'FINOLEXIND.NS', 'INDIHOTEL.NS', 'PEL.NS', 'ENGINEERSIN.NS', 'TV18BRDCST.NS', 'INFOE.NS'
-    }
-    TICKERS = [t for t in NIFTY500_TICKERS if t not in PROBLEMATIC]
-except:
+    from nifty500_universe import FILTERED_UNIVERSE as TICKERS
+except ImportError:
     # Fallback to smaller working universe
     TICKERS = [
         "RELIANCE.NS", "TCS.NS", "INFY.NS", "HDFCBANK.NS", "ICICIBANK.NS",
@@ -44,87 +32,20 @@ except:
         "TVSMOTOR.NS", "ASHOKLEY.NS", "TATACOMM.NS", "TATACONSUM.NS", "TATAMOTORS.NS"
     ]
 
-def chunked(iterable, n):
-    """Split an iterable into chunks of size n"""
-    for i in range(0, len(iterable), n):
-        yield iterable[i:i+n]
-
 def fetch_history(tickers, start_date, end_date):
     """Download historical data for all tickers - using proven strategy_backtest approach"""
     print(f"Fetching data for {len(tickers)} stocks from {start_date} to {end_date}...")
     
-    frames = []
-    failed_tickers = []
-    
-    for batch in chunked(tickers, 50):  # Increased from 40 to 50
-        try:
-            data = yf.download(
-                batch,
-                start=start_date,
-                end=end_date,
-                interval="1d",
-                auto_adjust=True,
-                progress=False,
-                group_by="ticker",
-            )
-            if data.empty:
-                failed_tickers.extend(batch)
-                continue
-            
-            if isinstance(data.columns, pd.MultiIndex):
-                prices = data.xs("Close", axis=1, level=1, drop_level=True)
-            else:
-                # Single ticker - handle edge case
-                prices = data[["Close"]]
-                prices.columns = batch[:1]
-            
-            # Track which tickers actually got data
-            actual_loaded = prices.columns.tolist()
-            failed_batch = [t for t in batch if t not in actual_loaded]
-            if failed_batch:
-                failed_tickers.extend(failed_batch)
-            
-            frames.append(prices)
-        except Exception as e:
-            print(f"Error downloading batch: {str(e)[:80]}")
-            failed_tickers.extend(batch)
-            continue
-    
-    if not frames:
-        print("ERROR: No price data fetched!")
-        return pd.DataFrame()
-    
-    combined = pd.concat(frames, axis=1).sort_index()
-    combined = combined.loc[:, ~combined.columns.duplicated()]
-    combined = combined.dropna(axis=1, thresh=int(0.8 * len(combined)))
+    combined, failed_tickers = download_history(tickers, start_date, end_date)
     
     if failed_tickers:
         print(f"Failed to load {len(failed_tickers)} tickers: {failed_tickers[:10]}")
+    if combined.empty:
+        print("ERROR: No price data fetched!")
+        return combined
     print(f"Successfully loaded {len(combined.columns)} stocks")
     return combined
 
-def compute_scores(window, momentum_weights):
-    """
-    Compute momentum scores with custom weights
-    momentum_weights: tuple of (w1m, w3m, w6m)
-    """
-    w1m, w3m, w6m = momentum_weights
-    ret1m = window.pct_change(21, fill_method=None).iloc[-1] * 100
-    ret3m = window.pct_change(63, fill_method=None).iloc[-1] * 100
-    ret6m = window.pct_change(126, fill_method=None).iloc[-1] * 100
-    vol = window.pct_change(fill_method=None).rolling(63).std().iloc[-1] * (252**0.5) * 100
-    
-    scores = w1m * ret1m + w3m * ret3m + w6m * ret6m
-    
-    result = pd.DataFrame({
-        'score': scores,
-        'ret1m': ret1m,
-        'ret3m': ret3m,
-        'ret6m': ret6m,
-        'vol': vol
-    })
-    return result.dropna()
-
 def run_backtest_enhanced(prices, start_date, end_date, top_n, vol_cap, stop_loss, 
                          momentum_weights, rebal_freq='W-FRI', dynamic_sizing=False):
     """
@@ -134,119 +55,62 @@ def run_backtest_enhanced(prices, start_date, end_date, top_n, vol_cap, stop_los
         dynamic_sizing: if True, weight by momentum score strength
         stop_loss: negative percentage for stop-loss (e.g., -10.0)
     """
-    df_rebal = prices.resample(rebal_freq).last().dropna(how='all')
+    rebal_dates, rebal_px, rows, window_lens = rebalance_schedule(prices, rebal_freq)
+    panels = compute_panels(prices)
     
-    portfolio = {}
+    shares = np.zeros(prices.shape[1])
+    entry_price = np.zeros(prices.shape[1])
     cash = 100000.0
-    equity_curve = []
+    equity = np.full(len(rebal_dates), np.nan)
     
-    for i, date in enumerate(df_rebal.index):
-        current_prices = df_rebal.loc[date]
-        valid_prices = current_prices.dropna()
+    for i, (row, window_len) in enumerate(zip(rows, window_lens)):
+        cols = np.flatnonzero(~np.isnan(rebal_px[i]))
         
-        if len(valid_prices) < 10:
+        if len(cols) < 10:
             continue
         
-        # Get 6-month window for momentum calc
-        window_start = date - pd.DateOffset(months=6)
-        window = prices.loc[window_start:date, valid_prices.index]
-        
-        if len(window) < 126:
+        if window_len < 126:
             continue
         
-        # Compute scores with custom momentum weights
-        scores = compute_scores(window, momentum_weights)
+        # Score this date's row of the precomputed panels; a 6-month
+        # return needs a full 127-row window
+        scores = compute_scores(panels, row, cols, momentum_weights, vol_cap, window_len > 126)
+        eligible = np.flatnonzero(~np.isnan(scores))
         
-        # Filter: vol < vol_cap, positive 3m and 6m
-        mask = (scores['vol'] < vol_cap) & (scores['ret3m'] > 0) & (scores['ret6m'] > 0)
-        filtered = scores[mask].sort_values('score', ascending=False)
-        
-        if len(filtered) == 0:
+        if len(eligible) == 0:
             continue
         
-        # Select top N
-        picks = filtered.head(top_n)
-        
-        # Check stop-losses and exits
-        portfolio_value = cash
-        to_sell = []
-        
-        for ticker, entry_data in list(portfolio.items()):
-            if ticker not in valid_prices.index:
-                continue
-            current_price = valid_prices[ticker]
-            entry_price = entry_data['entry_price']
-            shares = entry_data['shares']
-            
-            position_value = shares * current_price
-            portfolio_value += position_value
-            
-            # Stop-loss check
-            pct_change = ((current_price - entry_price) / entry_price) * 100
-            if pct_change <= stop_loss:
-                to_sell.append(ticker)
-            # Exit if not in top picks anymore
-            elif ticker not in picks.index:
-                to_sell.append(ticker)
-        
-        # Sell positions
-        for ticker in to_sell:
-            shares = portfolio[ticker]['shares']
-            sell_price = valid_prices[ticker]
-            cash += shares * sell_price
-            del portfolio[ticker]
-        
-        # Calculate target positions
-        portfolio_value = cash
-        for ticker in portfolio:
-            if ticker in valid_prices.index:
-                portfolio_value += portfolio[ticker]['shares'] * valid_prices[ticker]
+        # Select top N, best score first, without sorting the rest
+        top = eligible[top_n_indices(scores[eligible], top_n)]
         
-        # Buy new positions
         if dynamic_sizing:
             # Weight by score strength
-            total_score = picks['score'].sum()
-            target_weights = picks['score'] / total_score
+            target_weights = scores[top] / scores[top].sum()
         else:
             # Equal weight
-            target_weights = pd.Series(1.0 / len(picks), index=picks.index)
+            target_weights = np.full(len(top), 1.0 / len(top))
         
-        for ticker in picks.index:
-            if ticker not in portfolio:
-                target_value = portfolio_value * target_weights[ticker]
-                current_price = valid_prices[ticker]
-                shares_to_buy = int(target_value / current_price)
-                
-                if shares_to_buy > 0:
-                    cost = shares_to_buy * current_price
-                    if cost <= cash:
-                        portfolio[ticker] = {
-                            'shares': shares_to_buy,
-                            'entry_price': current_price
-                        }
-                        cash -= cost
-        
-        # Calculate total portfolio value
-        total_value = cash
-        for ticker in portfolio:
-            if ticker in valid_prices.index:
-                total_value += portfolio[ticker]['shares'] * valid_prices[ticker]
-        
-        equity_curve.append({'date': date, 'value': total_value})
+        # Sell stop-loss hits and dropped names, then buy new picks
+        cash, portfolio_value = rebalance_step(
+            rebal_px[i], shares, entry_price, cols[top],
+            target_weights, cash, stop_loss
+        )
+        equity[i] = portfolio_value
     
-    if len(equity_curve) < 2:
+    # Dates skipped above stay NaN and drop out of the curve
+    df_equity = pd.DataFrame({'value': equity}, index=rebal_dates).dropna()
+    if len(df_equity) < 2:
         return None
     
     # Calculate performance metrics
-    df_equity = pd.DataFrame(equity_curve).set_index('date')
     returns = df_equity['value'].pct_change().dropna()
     
     total_return = (df_equity['value'].iloc[-1] / df_equity['value'].iloc[0]) - 1
     years = (df_equity.index[-1] - df_equity.index[0]).days / 365.25
     cagr = ((1 + total_return) ** (1 / years) - 1) * 100
     
-    cumulative = (1 + returns).cumprod()
-    running_max = cumulative.expanding().max()
+    cumulative = (1 + returns.to_numpy()).cumprod()
+    running_max = np.maximum.accumulate(cumulative)
     drawdown = (cumulative - running_max) / running_max
     max_drawdown = drawdown.min() * 100
     
@@ -262,6 +126,18 @@ def run_backtest_enhanced(prices, start_date, end_date, top_n, vol_cap, stop_los
         'total_return': total_return * 100
     }
 
+def _run_config(config, prices, start_date, end_date):
+    """Backtest one grid configuration (run in a sweep worker)"""
+    return run_backtest_enhanced(
+        prices, start_date, end_date,
+        top_n=config['top_n'],
+        vol_cap=config['vol_cap'],
+        stop_loss=config['stop_loss'],
+        momentum_weights=config['momentum_weights'],
+        rebal_freq=config['rebal_freq'],
+        dynamic_sizing=config['dynamic_sizing']
+    )
+
 def optimize_strategy():
     """Run optimization grid on full expanded universe (10-year validation)"""
     # Extended period for robust backtest validation
@@ -271,8 +147,8 @@ def optimize_strategy():
     # Use full expanded universe (317 stocks) - NOT hardcoded limited list
     # TICKERS is already defined at module level from nifty500_universe.py
     
-    # Fetch data once
-    prices = fetch_history(TICKERS, START_DATE, END_DATE)
+    # Fetch data once; float32 halves the memory the scoring panels stream through
+    prices = fetch_history(TICKERS, START_DATE, END_DATE).astype(np.float32)
     
     # Parameter grid
     configurations = [
@@ -327,19 +203,12 @@ def optimize_strategy():
     
     results = []
     
-    for i, config in enumerate(configurations, 1):
+    # Configurations are backtested in parallel; results come back in grid
+    # order as each finishes, so progress prints as it goes
+    outcomes = run_sweep(_run_config, configurations, prices, START_DATE, END_DATE)
+    for i, (result, config) in enumerate(zip(outcomes, configurations), 1):
         print(f"\nTesting {i}/{len(configurations)}: {config['name']}...")
         
-        result = run_backtest_enhanced(
-            prices, START_DATE, END_DATE,
-            top_n=config['top_n'],
-            vol_cap=config['vol_cap'],
-            stop_loss=config['stop_loss'],
-            momentum_weights=config['momentum_weights'],
-            rebal_freq=config['rebal_freq'],
-            dynamic_sizing=config['dynamic_sizing']
-        )
-        
         if result:
             results.append({
                 'name': config['name'],
@@ -1,12 +1,34 @@
 import argparse
 import datetime as dt
+import hashlib
+import io
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 
+import numpy as np
+import pandas as pd
 import yaml
 import yfinance as yf
 
+try:
+    from numba import njit
+except ImportError:
+    # numba is optional; without it the kernels below run as plain Python
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        return lambda fn: fn
+
+try:
+    # libyaml-backed parser when PyYAML was built with it
+    from yaml import CSafeLoader as YamlLoader
+except ImportError:
+    from yaml import SafeLoader as YamlLoader
+
 # OPTIMIZED PARAMETERS (from final 10-year backtest on 317-stock universe)
 # Top6_SL10 showed best performance: 34.33% CAGR, Sharpe 4.49, MaxDD -13.27%
 # Strategy: 6 concentrated positions, -10% stop-loss, equal weight
@@ -20,6 +42,11 @@ REBALANCE_BAND = 0.03  # tighter tolerance
 HARD_CAP_WEIGHT = 0.18  # enforced cap for trims (adjusted for 6 stocks)
 TARGET_NEW_WEIGHT = 0.10  # target weight per new idea (1/6 ≈ 16.7%)
 VOL_CAP = 40.0  # volatility ceiling for momentum screen
+QUOTE_WORKERS = 16  # max concurrent quote/history requests (network-bound)
+QUOTE_TIMEOUT = 10  # seconds per history request
+DOWNLOAD_BATCH = 50  # tickers per batched history download
+CACHE_DIR = Path("cache")  # same-day price history cache
+QUOTE_TTL = 15 * 60  # seconds a cached live quote stays fresh
 
 # MOMENTUM WEIGHTS (balanced 0.3/0.4/0.3 - weights all periods equally)
 # Enables effective stock selection across different momentum periods
@@ -33,26 +60,7 @@ TOP_N_PICKS = 6  # Select top 6 momentum stocks per rebalance (concentrated)
 # Expanded NIFTY 500 Universe - filtered for data quality
 # Excludes known problematic tickers (delisted, bad data, etc.)
 try:
-    from nifty500_universe import NIFTY500_TICKERS
-    PROBLEMATIC_TICKERS = {
-        'CEAT.NS', 'PVR.NS', 'EQUITAS.NS', 'MINDTREE.NS', 'DRREDDYS.NS',
-        'INOXLEISUR.NS', 'JSW.NS', 'ALEMBICPH.NS', 'AARTI.NS', 'ZOMATO.NS',
-        'UJJIVAN.NS', 'DCB.NS', 'CARTRADETECH.NS', 'CADILAHC.NS', 'L&TFH.NS',
-        'VARUN.NS', 'ABBOTINDIA.NS', 'PHOENIXLTD.NS', 'TATAMOTORS.NS', 'NAVABREXIM.NS',
-        # Newly discovered delisted/bad data tickers
-        'NARAYANA.NS', 'PRISMCEM.NS', 'WELSPUNIND.NS', 'RAMSINFO.NS', 'ZENSAR.NS',
-        'INFOSYS.NS', 'IIFLWAM.NS', 'TATACHEMICALS.NS', 'TATACOFFEE.NS', 'BATA.NS',
-        'ADITYADK.NS', 'COX&KINGS.NS', 'HBLPOWER.NS', 'TECHNICALA.NS', 'AMARAJABAT.NS',
-        'BHARAT FORGE.NS', 'SONA.NS', 'SAMVARDHNA.NS', 'HINDWARE.NS', 'SWANENERGY.NS',
-        'ADANITRANS.NS', 'ORIENTGREEN.NS', 'WEBSOL.NS', 'BOROSIL.NS', 'ORIENTALCARB.NS',
-        'GATI.NS', 'AEGISCHEM.NS', 'VRL.NS', 'SIYARAM.NS', 'KPR.NS',
-        'FINOLEX.NS', 'RELAXOHOME.NS', 'KALPATPOWR.NS', 'CENTURYTEXT.NS', 'APTECH.NS',
-        'NIITTECH.NS', 'FIRSTSOURCE.NS', 'HEXAWARE.NS', 'BALRAMPUR.NS', 'DHAMPUR.NS',
-        'FINOLEXIND.NS',  # Additional bad ticker
-        # Additional bad tickers from expanded universe
-        'INDIHOTEL.NS', 'PEL.NS', 'ENGINEERSIN.NS', 'TV18BRDCST.NS', 'INFOE.NS'
-    }
-    MOMENTUM_UNIVERSE = [t for t in NIFTY500_TICKERS if t not in PROBLEMATIC_TICKERS]
+    from nifty500_universe import FILTERED_UNIVERSE as MOMENTUM_UNIVERSE, PROBLEMATIC_TICKERS
     print(f"Loaded NIFTY 500 universe: {len(MOMENTUM_UNIVERSE)} stocks (filtered {len(PROBLEMATIC_TICKERS)} bad tickers)")
 except ImportError:
     # Fallback to smaller curated list if nifty500_universe.py not available
@@ -130,7 +138,7 @@ class PositionResult:
 
 
 def load_holdings(path: Path) -> List[Holding]:
-    data = yaml.safe_load(path.read_text())
+    data = yaml.load(path.read_text(), Loader=YamlLoader)
     holdings = []
     for raw in data.get("holdings", []):
         holdings.append(
@@ -145,106 +153,309 @@ def load_holdings(path: Path) -> List[Holding]:
     return holdings
 
 
-def fetch_quotes(tickers: List[str]) -> Dict[str, Optional[float]]:
+_TICKER_CACHE: Dict[str, yf.Ticker] = {}
+
+
+def _ticker(symbol: str) -> yf.Ticker:
+    # Reuse Ticker objects within a run
+    t = _TICKER_CACHE.get(symbol)
+    if t is None:
+        t = _TICKER_CACHE[symbol] = yf.Ticker(symbol)
+    return t
+
+
+def _fetch_quote(ticker: str) -> Tuple[str, Optional[float]]:
+    try:
+        t = _ticker(ticker)
+        fast = getattr(t, "fast_info", None)
+        if fast:
+            price = fast.get("last_price") or fast.get("regular_market_price")
+            if price:
+                return ticker, float(price)
+        hist = t.history(period="1d", timeout=QUOTE_TIMEOUT)
+        if not hist.empty:
+            return ticker, float(hist["Close"].iloc[-1])
+    except Exception:
+        pass
+    return ticker, None
+
+
+def _fetch_quotes_live(tickers: List[str]) -> Dict[str, Optional[float]]:
     prices: Dict[str, Optional[float]] = {t: None for t in tickers}
+    # Today's bar for every symbol in one batched request
+    try:
+        data = yf.download(
+            tickers,
+            period="1d",
+            interval="1d",
+            group_by="ticker",
+            auto_adjust=True,
+            threads=QUOTE_WORKERS,
+            timeout=QUOTE_TIMEOUT,
+            progress=False,
+        )
+    except Exception:
+        data = pd.DataFrame()
     for ticker in tickers:
         try:
-            t = yf.Ticker(ticker)
-            fast = getattr(t, "fast_info", None)
-            if fast:
-                price = fast.get("last_price") or fast.get("regular_market_price")
-                if price:
-                    prices[ticker] = float(price)
-                    continue
-            hist = t.history(period="1d")
-            if not hist.empty:
-                prices[ticker] = float(hist["Close"].iloc[-1])
-        except Exception:
-            prices[ticker] = None
+            close = data[ticker]["Close"].dropna()
+        except KeyError:
+            continue
+        if not close.empty:
+            prices[ticker] = float(close.iloc[-1])
+
+    # Per-ticker fallback for anything the batch missed; these are pure network
+    # waits, so threads overlap them despite the GIL
+    missing = [t for t, p in prices.items() if p is None]
+    if missing:
+        with ThreadPoolExecutor(max_workers=min(QUOTE_WORKERS, len(missing))) as ex:
+            for ticker, price in ex.map(_fetch_quote, missing):
+                prices[ticker] = price
+    return prices
+
+
+def fetch_quotes(tickers: List[str]) -> Dict[str, Optional[float]]:
+    prices: Dict[str, Optional[float]] = {t: None for t in tickers}
+    if not tickers:
+        return prices
+    # Quotes younger than QUOTE_TTL are reused across runs; only stale ones hit the network
+    cache_file = CACHE_DIR / "quotes.json"
+    try:
+        cache: Dict[str, List[float]] = json.loads(cache_file.read_text())
+    except (OSError, ValueError):
+        cache = {}
+    now = time.time()
+    for ticker in tickers:
+        hit = cache.get(ticker)
+        if hit and now - hit[0] < QUOTE_TTL:
+            prices[ticker] = hit[1]
+
+    stale = [t for t, p in prices.items() if p is None]
+    if stale:
+        live = _fetch_quotes_live(stale)
+        prices.update(live)
+        fresh = {t: [now, p] for t, p in live.items() if p is not None}
+        if fresh:
+            cache.update(fresh)
+            CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            cache_file.write_text(json.dumps(cache))
     return prices
 
 
-def evaluate_action(pnl_pct: Optional[float], weight: Optional[float]) -> Tuple[str, str]:
-    if pnl_pct is None or weight is None:
-        return "Review", "Price missing"
-    if pnl_pct <= STOP_LOSS_PCT:
-        return "Sell", "Stop loss hit"
-    if pnl_pct >= TAKE_PROFIT_PCT and weight >= (MAX_WEIGHT - REBALANCE_BAND):
-        return "Trim", "Lock gains and rebalance"
-    if weight > (MAX_WEIGHT + REBALANCE_BAND):
-        return "Trim", "Overweight vs cap"
-    return "Hold", "Within bands"
+def evaluate_actions(pnl_pct: np.ndarray, weight: np.ndarray) -> Tuple[List[str], List[str]]:
+    # Rules are checked in order; NaN pnl/weight means the price is missing
+    conditions = [
+        np.isnan(pnl_pct) | np.isnan(weight),
+        pnl_pct <= STOP_LOSS_PCT,
+        (pnl_pct >= TAKE_PROFIT_PCT) & (weight >= (MAX_WEIGHT - REBALANCE_BAND)),
+        weight > (MAX_WEIGHT + REBALANCE_BAND),
+    ]
+    actions = np.select(conditions, ["Review", "Sell", "Trim", "Trim"], default="Hold")
+    notes = np.select(
+        conditions,
+        ["Price missing", "Stop loss hit", "Lock gains and rebalance", "Overweight vs cap"],
+        default="Within bands",
+    )
+    return actions.tolist(), notes.tolist()
+
+
+def _optional(value: float) -> Optional[float]:
+    return None if np.isnan(value) else float(value)
 
 
 def build_positions(holdings: List[Holding]) -> Tuple[List[PositionResult], float, float]:
     tickers = [h.ticker for h in holdings if h.ticker]
     prices = fetch_quotes(tickers) if tickers else {}
 
-    results: List[PositionResult] = []
-    total_market = 0.0
-    total_cost = 0.0
-
-    for h in holdings:
-        price = h.manual_price if h.manual_price is not None else prices.get(h.ticker) if h.ticker else None
-        cost = h.quantity * h.avg_price
-        market_value = h.quantity * price if price is not None else None
-        pnl_abs = (market_value - cost) if market_value is not None else None
-        pnl_pct = ((pnl_abs / cost) * 100) if pnl_abs is not None and cost else None
-        total_cost += cost
-        if market_value is not None:
-            total_market += market_value
-        results.append(
-            PositionResult(
-                holding=h,
-                price=price,
-                market_value=market_value,
-                cost=cost,
-                pnl_abs=pnl_abs,
-                pnl_pct=pnl_pct,
-                weight=None,  # set later once totals are known
-                action="",
-                note="",
-            )
+    # Column arrays over all holdings; a missing price is NaN and flows through as "na"
+    prices_get = prices.get
+    price = np.array(
+        [
+            h.manual_price if h.manual_price is not None else (prices_get(h.ticker) if h.ticker else None)
+            for h in holdings
+        ],
+        dtype=float,
+    )
+    qty = np.array([h.quantity for h in holdings], dtype=float)
+    avg = np.array([h.avg_price for h in holdings], dtype=float)
+
+    cost = qty * avg
+    market_value = qty * price
+    pnl_abs = market_value - cost
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pnl_pct = np.where(cost != 0, (pnl_abs / cost) * 100, np.nan)
+        total_market = float(np.nansum(market_value))
+        total_cost = float(cost.sum())
+        weight = market_value / total_market if total_market else np.full(len(holdings), np.nan)
+    actions, notes = evaluate_actions(pnl_pct, weight)
+
+    results = [
+        PositionResult(
+            holding=h,
+            price=_optional(price[i]),
+            market_value=_optional(market_value[i]),
+            cost=float(cost[i]),
+            pnl_abs=_optional(pnl_abs[i]),
+            pnl_pct=_optional(pnl_pct[i]),
+            weight=_optional(weight[i]),
+            action=actions[i],
+            note=notes[i],
         )
+        for i, h in enumerate(holdings)
+    ]
+    return results, total_market, total_cost
 
-    for r in results:
-        r.weight = (r.market_value / total_market) if r.market_value is not None and total_market else None
-        action, note = evaluate_action(r.pnl_pct, r.weight)
-        r.action = action
-        r.note = note
 
-    return results, total_market, total_cost
+_CLOSES_MEMO: Dict[Path, pd.DataFrame] = {}
 
 
-def momentum_screen(top_n: int = TOP_N_PICKS, vol_cap: float = VOL_CAP) -> List[Tuple[str, float, float, float, float, float]]:
-    rows: List[Tuple[str, float, float, float, float, float]] = []
-    for ticker in MOMENTUM_UNIVERSE:
+def _download_closes(tickers: List[str], start: dt.date) -> Tuple[pd.DataFrame, List[str]]:
+    # Adjusted daily closes since start as (days, tickers), plus the symbols that didn't load.
+    # Batches keep each request bounded and isolate a failed batch from the rest.
+    frames: List[pd.DataFrame] = []
+    failed: List[str] = []
+    for i in range(0, len(tickers), DOWNLOAD_BATCH):
+        batch = tickers[i:i + DOWNLOAD_BATCH]
         try:
-            hist = yf.Ticker(ticker).history(period="9mo", interval="1d")
-            if hist.empty or len(hist) < 140:
-                continue
-            adj = hist["Close"]
-            ret1m = (adj.iloc[-1] / adj.iloc[-22] - 1) * 100
-            ret3m = (adj.iloc[-1] / adj.iloc[-66] - 1) * 100
-            ret6m = (adj.iloc[-1] / adj.iloc[-132] - 1) * 100
-            vol = adj.pct_change().rolling(66).std().iloc[-1] * (252 ** 0.5) * 100
-            # OPTIMIZED: weights favor longer-term trends (20/30/50 vs old 30/40/30)
-            w1m, w3m, w6m = MOMENTUM_WEIGHTS
-            score = w1m * ret1m + w3m * ret3m + w6m * ret6m
-            if vol < vol_cap and ret3m > 0 and ret6m > 0:
-                rows.append((ticker, ret1m, ret3m, ret6m, vol, score))
+            data = yf.download(
+                batch,
+                start=start,
+                interval="1d",
+                group_by="ticker",
+                auto_adjust=True,
+                threads=QUOTE_WORKERS,
+                timeout=QUOTE_TIMEOUT,
+                progress=False,
+            )
+            close = data.xs("Close", axis=1, level=1)
         except Exception:
+            failed.extend(batch)
+            continue
+        # yfinance doesn't raise for symbols that failed inside a batch (throttled,
+        # timed out); they come back missing or as all-NaN columns
+        missing = close.reindex(columns=batch).isna().all()
+        failed.extend(missing.index[missing])
+        frames.append(close.loc[:, close.notna().any()])
+    frames = [f for f in frames if not f.empty]
+    if not frames:
+        return pd.DataFrame(), failed
+    closes = pd.concat(frames, axis=1).sort_index()
+    return closes.loc[:, ~closes.columns.duplicated()], failed
+
+
+def cached_closes(tickers: List[str], months: int) -> pd.DataFrame:
+    # Adjusted daily closes for the last `months` months as (days, tickers). Only Close is
+    # kept, so cached copies are a fraction of the OHLCV download. Same-day reruns read
+    # from disk and repeated calls within one process reuse the frame already in memory.
+    today = dt.date.today()
+    key = hashlib.md5(",".join(sorted(tickers)).encode()).hexdigest()[:8]
+    path = CACHE_DIR / f"closes-{months}mo-{today}-{key}.pkl"
+    closes = _CLOSES_MEMO.get(path)
+    if closes is not None:
+        return closes
+    if path.exists():
+        # Today's closes so far, plus the symbols that haven't loaded yet today
+        # (files written before the failed list was kept hold just the frame)
+        cached = pd.read_pickle(path)
+        closes, failed = cached if isinstance(cached, tuple) else (cached, [])
+    else:
+        closes, failed = pd.DataFrame(), list(tickers)
+    if failed:
+        # Only the missing symbols are requested. An explicit start date rather than a
+        # period: Yahoo's fixed ranges jump from 6mo to 1y, and older yfinance releases
+        # reject custom periods.
+        start = (pd.Timestamp(today) - pd.DateOffset(months=months)).date()
+        fetched, failed = _download_closes(failed, start)
+        if not fetched.empty:
+            closes = fetched if closes.empty else pd.concat([closes, fetched], axis=1).sort_index()
+            CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            pd.to_pickle((closes, failed), path)
+            # Only today's file is ever read; drop earlier days' copies of this universe
+            for stale in CACHE_DIR.glob(f"closes-{months}mo-*-{key}.pkl"):
+                if stale != path:
+                    stale.unlink(missing_ok=True)
+        if closes.empty:
+            return closes
+    _CLOSES_MEMO[path] = closes
+    return closes
+
+
+# (ticker, ret1m, ret3m, ret6m, vol, score, last_close)
+MomentumRow = Tuple[str, float, float, float, float, float, float]
+
+
+@njit(cache=True)
+def momentum_kernel(closes, w1m, w3m, w6m):
+    # closes: (tickers, days), each row right-aligned with >= 133 valid bars.
+    # Returns (tickers, 5): ret1m, ret3m, ret6m, vol, score; rows failing the
+    # positive 3m/6m trend filter are left NaN without computing volatility.
+    n = closes.shape[0]
+    out = np.full((n, 5), np.nan)
+    for i in range(n):
+        row = closes[i]
+        last = row[-1]
+        ret3m = (last / row[-66] - 1) * 100
+        ret6m = (last / row[-132] - 1) * 100
+        if not (ret3m > 0 and ret6m > 0):
             continue
-    rows.sort(key=lambda r: r[5], reverse=True)
-    return rows[:top_n]
+        ret1m = (last / row[-22] - 1) * 100
+        # Sample std of the last 66 daily returns
+        mean = 0.0
+        for k in range(-66, 0):
+            mean += row[k] / row[k - 1] - 1
+        mean /= 66
+        var = 0.0
+        for k in range(-66, 0):
+            d = row[k] / row[k - 1] - 1 - mean
+            var += d * d
+        vol = np.sqrt(var / 65) * (252 ** 0.5) * 100
+        out[i, 0] = ret1m
+        out[i, 1] = ret3m
+        out[i, 2] = ret6m
+        out[i, 3] = vol
+        out[i, 4] = w1m * ret1m + w3m * ret3m + w6m * ret6m
+    return out
+
+
+def momentum_screen(top_n: int = TOP_N_PICKS, vol_cap: float = VOL_CAP) -> List[MomentumRow]:
+    # One batched download (threaded inside yfinance) instead of a round-trip per ticker
+    close = cached_closes(MOMENTUM_UNIVERSE, months=7)  # (days, tickers)
+    if close.empty:
+        return []
+
+    # Push each ticker's missing bars to the front (stable, so bar order is kept):
+    # index -k then means k bars back in that ticker's own history, as per-ticker dropna did.
+    raw = close.to_numpy(dtype=float).T
+    valid = ~np.isnan(raw)
+    closes = np.take_along_axis(raw, np.argsort(valid, axis=1, kind="stable"), axis=1)
+    keep = valid.sum(axis=1) >= 133  # 6m return reads bar -132; one bar of slack
+    kept = closes[keep]
+    # OPTIMIZED: weights favor longer-term trends (20/30/50 vs old 30/40/30)
+    w1m, w3m, w6m = MOMENTUM_WEIGHTS
+    stats = momentum_kernel(kept, w1m, w3m, w6m)
+
+    names = close.columns[keep]
+    ret3m, ret6m, vol, score = stats[:, 1], stats[:, 2], stats[:, 3], stats[:, 4]
+    idx = np.flatnonzero((vol < vol_cap) & (ret3m > 0) & (ret6m > 0))
+    # Partial selection of the top_n scores, then order only those
+    if 0 < top_n < len(idx):
+        idx = idx[np.argpartition(-score[idx], top_n - 1)[:top_n]]
+    idx = idx[np.argsort(-score[idx], kind="stable")][:top_n]
+    # Last close doubles as the buy price in plan_rebalance, saving a second quote round-trip
+    return [(names[i], *stats[i].tolist(), float(kept[i, -1])) for i in idx]
+
+
+# Plan sections are written line by line; every line after the first starts with a newline
+_RULE = "\n" + "=" * 80
 
 
 def plan_rebalance(
     results: List[PositionResult],
     total_market: float,
-    momentum: List[Tuple[str, float, float, float, float, float]],
+    momentum: List[MomentumRow],
 ) -> Tuple[str, List[str]]:
-    lines: List[str] = []
+    buf = io.StringIO()
+    w = buf.write
     tldr: List[str] = []
     sell_cash = 0.0
     trims: List[Tuple[str, float, int, float, float]] = []  # (name, value, shares, price, new_value)
@@ -267,72 +478,70 @@ def plan_rebalance(
                 sell_cash += actual_trim_value
                 trims.append((r.holding.name, actual_trim_value, shares_to_sell, r.price, new_position_value))
 
-    lines.append(f"Cash to redeploy (from sells/trims): {sell_cash:,.0f}")
+    w(f"Cash to redeploy (from sells/trims): {sell_cash:,.0f}")
     tldr.append(f"Cash to redeploy: ~{sell_cash:,.0f}")
     if not trims:
-        lines.append("No sells/trims triggered; zero fresh cash.")
+        w("\nNo sells/trims triggered; zero fresh cash.")
     else:
-        lines.append("\nDETAILED SELL/TRIM INSTRUCTIONS:")
-        lines.append("=" * 80)
+        w("\n\nDETAILED SELL/TRIM INSTRUCTIONS:")
+        w(_RULE)
         tldr_parts = []
         for name, value, shares, price, new_value in trims:
             if new_value == 0:
                 # Full sell
-                lines.append(f"\n🔴 SELL ALL: {name}")
-                lines.append(f"   Sell {shares} shares @ ₹{price:,.2f} = ₹{value:,.2f}")
-                lines.append(f"   Position after: 0 shares (CLOSED)")
+                w(f"\n\n🔴 SELL ALL: {name}")
+                w(f"\n   Sell {shares} shares @ ₹{price:,.2f} = ₹{value:,.2f}")
+                w(f"\n   Position after: 0 shares (CLOSED)")
                 tldr_parts.append(f"{name} {shares}sh")
             else:
                 # Partial trim
-                lines.append(f"\n✂️  TRIM: {name}")
-                lines.append(f"   Sell {shares} shares @ ₹{price:,.2f} = ₹{value:,.2f}")
-                lines.append(f"   Position after: ₹{new_value:,.2f} ({(new_value/total_market)*100:.1f}% weight)")
+                w(f"\n\n✂️  TRIM: {name}")
+                w(f"\n   Sell {shares} shares @ ₹{price:,.2f} = ₹{value:,.2f}")
+                w(f"\n   Position after: ₹{new_value:,.2f} ({(new_value/total_market)*100:.1f}% weight)")
                 tldr_parts.append(f"{name} {shares}sh")
-        lines.append("=" * 80)
+        w(_RULE)
         tldr.append("Trims/Sells: " + "; ".join(tldr_parts))
 
     if sell_cash <= 0:
-        return "\n".join(lines), tldr
+        return buf.getvalue(), tldr
 
-    existing = {r.holding.ticker for r in results if r.holding.ticker}
-    candidates = [(t, m1, m3, m6, v, s) for t, m1, m3, m6, v, s in momentum if t not in existing]
+    existing = frozenset(r.holding.ticker for r in results if r.holding.ticker)
+    candidates = [row for row in momentum if row[0] not in existing]
     if not candidates:
-        lines.append("No new momentum candidates outside current holdings.")
-        return "\n".join(lines), tldr
+        w("\nNo new momentum candidates outside current holdings.")
+        return buf.getvalue(), tldr
 
     buy_list = candidates[:3]
     per_slot = sell_cash / len(buy_list)
-    prices = fetch_quotes([t for t, *_ in buy_list])
-    lines.append("\nDETAILED BUY INSTRUCTIONS:")
-    lines.append("=" * 80)
+    w("\n\nDETAILED BUY INSTRUCTIONS:")
+    w(_RULE)
     total_to_spend = 0.0
-    for ticker, m1, m3, m6, vol, score in buy_list:
-        price = prices.get(ticker)
+    for ticker, m1, m3, m6, vol, score, price in buy_list:
         if not price:
-            lines.append(f"\n⚠️  {ticker}: price unavailable; skip")
+            w(f"\n\n⚠️  {ticker}: price unavailable; skip")
             continue
         shares = int(per_slot // price)
         spend = shares * price
         total_to_spend += spend
-        lines.append(f"\n🟢 BUY: {ticker}")
-        lines.append(f"   Buy {shares} shares @ ₹{price:,.2f} = ₹{spend:,.2f}")
-        lines.append(f"   Momentum: score {score:.1f} | 1m +{m1:.1f}% | 3m +{m3:.1f}% | 6m +{m6:.1f}%")
-        lines.append(f"   Volatility: {vol:.1f}%")
+        w(f"\n\n🟢 BUY: {ticker}")
+        w(f"\n   Buy {shares} shares @ ₹{price:,.2f} = ₹{spend:,.2f}")
+        w(f"\n   Momentum: score {score:.1f} | 1m +{m1:.1f}% | 3m +{m3:.1f}% | 6m +{m6:.1f}%")
+        w(f"\n   Volatility: {vol:.1f}%")
         if shares > 0:
             tldr.append(f"Buy {shares} x {ticker} (~{spend:,.0f})")
     
-    lines.append("=" * 80)
-    lines.append(f"\n💰 CASH SUMMARY:")
-    lines.append(f"   Total from sells/trims: ₹{sell_cash:,.2f}")
-    lines.append(f"   Total to deploy in buys: ₹{total_to_spend:,.2f}")
-    lines.append(f"   Remaining cash: ₹{sell_cash - total_to_spend:,.2f}")
+    w(_RULE)
+    w(f"\n\n💰 CASH SUMMARY:")
+    w(f"\n   Total from sells/trims: ₹{sell_cash:,.2f}")
+    w(f"\n   Total to deploy in buys: ₹{total_to_spend:,.2f}")
+    w(f"\n   Remaining cash: ₹{sell_cash - total_to_spend:,.2f}")
     
-    return "\n".join(lines), tldr
+    return buf.getvalue(), tldr
 
 
 def save_outputs(
     report: str,
-    momentum: List[Tuple[str, float, float, float, float, float]],
+    momentum: List[MomentumRow],
     plan: str,
     tldr: List[str],
     top_n: int,
@@ -342,47 +551,56 @@ def save_outputs(
     out_dir.mkdir(parents=True, exist_ok=True)
     ts = dt.datetime.now().strftime("%Y%m%d-%H%M%S")
     out_file = out_dir / f"report-{ts}.txt"
-    lines: List[str] = []
-    lines.append("TLDR:")
-    if tldr:
-        for item in tldr:
-            lines.append(f"- {item}")
-    else:
-        lines.append("- No actions suggested")
-    lines.append("")
-    lines.append(report)
-    lines.append(f"\nMomentum short-list (top {len(momentum)}, vol<{vol_cap:.0f}%):")
-    for t, m1, m3, m6, vol, score in momentum:
-        lines.append(f"- {t}: score {score:0.1f} | 1m {m1:0.1f}% | 3m {m3:0.1f}% | 6m {m6:0.1f}% | vol {vol:0.1f}%")
-    lines.append("\nCash-neutral rebalance plan:")
-    lines.append(plan)
-    out_file.write_text("\n".join(lines))
+    # Stream sections straight to the file instead of joining one big string
+    with out_file.open("w") as f:
+        f.write("TLDR:\n")
+        if tldr:
+            for item in tldr:
+                f.write(f"- {item}\n")
+        else:
+            f.write("- No actions suggested\n")
+        f.write("\n")
+        f.write(report)
+        f.write(f"\n\nMomentum short-list (top {len(momentum)}, vol<{vol_cap:.0f}%):")
+        for t, m1, m3, m6, vol, score, _ in momentum:
+            f.write(f"\n- {t}: score {score:0.1f} | 1m {m1:0.1f}% | 3m {m3:0.1f}% | 6m {m6:0.1f}% | vol {vol:0.1f}%")
+        f.write("\n\nCash-neutral rebalance plan:\n")
+        f.write(plan)
     return out_file
 
 
+_REPORT_ROW = "{:24.24s} {:5.0f} {:10.2f} {:>10s} {:>12s} {:>12s} {:>7s} {:>6s} {:>8s} {}".format
+
+
+def _report_row(r: PositionResult) -> str:
+    return _REPORT_ROW(
+        r.holding.name,
+        r.holding.quantity,
+        r.holding.avg_price,
+        f"{r.price:,.2f}" if r.price is not None else "na",
+        f"{r.market_value:,.2f}" if r.market_value is not None else "na",
+        f"{r.pnl_abs:,.2f}" if r.pnl_abs is not None else "na",
+        f"{r.pnl_pct:5.1f}" if r.pnl_pct is not None else " na",
+        f"{r.weight * 100:5.1f}" if r.weight is not None else " na",
+        r.action,
+        r.note,
+    )
+
+
 def render_report(results: List[PositionResult], total_market: float, total_cost: float) -> str:
-    lines: List[str] = []
-    lines.append(f"Report date: {dt.date.today()}")
-    lines.append("")
+    buf = io.StringIO()
+    w = buf.write
     header = f"{'Name':24s} {'Qty':>5s} {'Avg':>10s} {'Price':>10s} {'Mkt Val':>12s} {'PnL':>12s} {'PnL%':>7s} {'Wt%':>6s} {'Action':>8s} Note"
-    lines.append(header)
-    lines.append("-" * len(header))
-
+    w(f"Report date: {dt.date.today()}\n\n{header}\n{'-' * len(header)}\n")
     for r in results:
-        price_str = f"{r.price:,.2f}" if r.price is not None else "na"
-        mkt_str = f"{r.market_value:,.2f}" if r.market_value is not None else "na"
-        pnl_str = f"{r.pnl_abs:,.2f}" if r.pnl_abs is not None else "na"
-        pnl_pct_str = f"{r.pnl_pct:5.1f}" if r.pnl_pct is not None else " na"
-        wt_str = f"{(r.weight or 0)*100:5.1f}" if r.weight is not None else " na"
-        lines.append(
-            f"{r.holding.name:24.24s} {r.holding.quantity:5.0f} {r.holding.avg_price:10.2f} {price_str:>10s} {mkt_str:>12s} {pnl_str:>12s} {pnl_pct_str:>7s} {wt_str:>6s} {r.action:>8s} {r.note}"
-        )
+        w(_report_row(r))
+        w("\n")
 
     pnl_port = total_market - total_cost
     pnl_port_pct = (pnl_port / total_cost * 100) if total_cost else 0.0
-    lines.append("-")
-    lines.append(f"Invested: {total_cost:,.2f} | Market: {total_market:,.2f} | PnL: {pnl_port:,.2f} ({pnl_port_pct:0.2f}%)")
-    return "\n".join(lines)
+    w("-\n")
+    w(f"Invested: {total_cost:,.2f} | Market: {total_market:,.2f} | PnL: {pnl_port:,.2f} ({pnl_port_pct:0.2f}%)")
+    return buf.getvalue()
 
 
 def main() -> None:
@@ -430,7 +648,7 @@ def main() -> None:
     plan, tldr = plan_rebalance(results, total_market, momentum)
     print(report)
     print(f"\nMomentum short-list (top {len(momentum)}, vol<{VOL_CAP:.0f}%):")
-    for t, m1, m3, m6, vol, score in momentum:
+    for t, m1, m3, m6, vol, score, _ in momentum:
         print(f"- {t}: score {score:0.1f} | 1m {m1:0.1f}% | 3m {m3:0.1f}% | 6m {m6:0.1f}% | vol {vol:0.1f}%")
     print("\nCash-neutral rebalance plan:")
     print(plan)
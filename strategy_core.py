@@ -0,0 +1,240 @@
+"""
+Shared Backtest Core
+Price downloads, score panels, momentum scoring, the rebalance step and the
+parameter-sweep pool used by optimize_strategy.py and test_improvements.py
+"""
+
+import multiprocessing as mp
+import os
+import random
+import time
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+try:
+    import bottleneck as bn
+except ImportError:
+    # bottleneck is optional; rolling volatility falls back to pandas
+    bn = None
+
+try:
+    from numba import njit
+except ImportError:
+    # numba is optional; without it the kernels run as plain Python
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        return lambda fn: fn
+
+DOWNLOAD_BATCH = 50  # tickers per batched history download
+FALLBACK_PAUSE = 1.0  # seconds between single-ticker requests after a batch failed
+
+def chunked(iterable, n):
+    """Split an iterable into chunks of size n"""
+    for i in range(0, len(iterable), n):
+        yield iterable[i:i+n]
+
+def download_closes(batch, start_date, end_date, attempts=4):
+    """
+    Close prices for one batch as (days, tickers), backing off and retrying on
+    errors or empty (throttled) responses; re-raises the last attempt's error
+    """
+    for attempt in range(attempts):
+        try:
+            data = yf.download(
+                batch,
+                start=start_date,
+                end=end_date,
+                interval="1d",
+                auto_adjust=True,
+                progress=False,
+                group_by="ticker",
+            )
+        except Exception:
+            if attempt == attempts - 1:
+                raise
+            data = None
+        if data is not None and not data.empty:
+            if attempt:
+                print(f"Batch starting {batch[0]} loaded on attempt {attempt + 1}")
+            if isinstance(data.columns, pd.MultiIndex):
+                return data.xs("Close", axis=1, level=1, drop_level=True)
+            # Single ticker - handle edge case
+            prices = data[["Close"]]
+            prices.columns = batch[:1]
+            return prices
+        if attempt < attempts - 1:
+            time.sleep(2 ** attempt + random.random())
+    return pd.DataFrame()
+
+def download_history(tickers, start_date, end_date):
+    """
+    Close prices for all tickers in batches, dropping tickers with under 80%
+    of days; returns (prices, failed tickers)
+    """
+    frames = []
+    failed = []
+    for batch in chunked(tickers, DOWNLOAD_BATCH):
+        try:
+            prices = download_closes(batch, start_date, end_date)
+        except Exception as e:
+            print(f"Error downloading batch: {str(e)[:80]}")
+            prices = pd.DataFrame()
+        if not prices.empty:
+            # yf.download doesn't raise when single symbols in a batch fail
+            # (throttled, timed out); they come back missing or all-NaN
+            missing = prices.reindex(columns=batch).isna().all()
+            failed.extend(missing.index[missing])
+            frames.append(prices)
+            continue
+        # The batch still failed after retries; fetch its tickers one at a time
+        # so a single bad symbol cannot take the rest of the batch with it.
+        # That is usually throttling, so the requests are paced.
+        for ticker in batch:
+            time.sleep(FALLBACK_PAUSE)
+            try:
+                prices = download_closes([ticker], start_date, end_date, attempts=2)
+            except Exception:
+                prices = pd.DataFrame()
+            if prices.empty or prices.isna().all().all():
+                failed.append(ticker)
+            else:
+                frames.append(prices)
+
+    if not frames:
+        return pd.DataFrame(), failed
+    combined = pd.concat(frames, axis=1).sort_index()
+    combined = combined.loc[:, ~combined.columns.duplicated()]
+    combined = combined.dropna(axis=1, thresh=int(0.8 * len(combined)))
+    return combined, failed
+
+def compute_panels(prices):
+    """
+    Momentum returns and volatility for every ticker on every day,
+    computed once over the full history (all in percent, float32)
+    """
+    arr = prices.to_numpy(dtype=np.float32)
+    panels = {}
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for name, lag in (('ret1m', 21), ('ret3m', 63), ('ret6m', 126)):
+            ret = np.full_like(arr, np.nan)
+            ret[lag:] = (arr[lag:] / arr[:-lag] - 1) * 100
+            panels[name] = ret
+    daily_ret = prices.pct_change(fill_method=None).to_numpy(dtype=np.float64)
+    if bn is not None:
+        std = bn.move_std(daily_ret, window=63, axis=0, ddof=1)
+    else:
+        std = pd.DataFrame(daily_ret).rolling(63).std().to_numpy()
+    # Row-major like the return panels: each rebalance reads one row across tickers
+    panels['vol'] = np.ascontiguousarray(std * (252**0.5) * 100, dtype=np.float32)
+    return panels
+
+@njit(cache=True)
+def _score_kernel(ret1m, ret3m, ret6m, vol, row, cols, w1m, w3m, w6m, vol_cap, has_6m):
+    scores = np.full(len(cols), np.nan)
+    for j in range(len(cols)):
+        c = cols[j]
+        r1 = ret1m[row, c]
+        r3 = ret3m[row, c]
+        r6 = ret6m[row, c] if has_6m else np.nan
+        if vol[row, c] < vol_cap and r3 > 0 and r6 > 0 and not np.isnan(r1):
+            scores[j] = w1m * r1 + w3m * r3 + w6m * r6
+    return scores
+
+def compute_scores(panels, row, cols, momentum_weights, vol_cap, has_6m):
+    """
+    Weighted momentum score (float64) of each ticker in cols on panel row `row`
+    NaN for tickers missing data or failing vol < vol_cap, positive 3m and 6m;
+    a 6-month return needs a full 127-row lookback window (has_6m)
+    """
+    w1m, w3m, w6m = momentum_weights
+    return _score_kernel(
+        panels['ret1m'], panels['ret3m'], panels['ret6m'], panels['vol'],
+        row, cols, w1m, w3m, w6m, vol_cap, has_6m
+    )
+
+def top_n_indices(values, n):
+    """Positions of the n largest values, best first, without sorting the rest"""
+    if n < len(values):
+        idx = np.argpartition(-values, n - 1)[:n]
+    else:
+        idx = np.arange(len(values))
+    return idx[np.argsort(-values[idx], kind='stable')]
+
+def rebalance_schedule(prices, rebal_freq):
+    """
+    Rebalance dates for rebal_freq, with their prices as float64 (trading and
+    valuation stay float64; float32 is only for the scoring panels), the panel
+    row of each date's last trading day (period labels can fall on holidays,
+    so not an exact lookup) and the length of its 6-month lookback window
+    """
+    rebal_prices = prices.resample(rebal_freq).last().dropna(how='all')
+    rebal_dates = rebal_prices.index
+    rows = prices.index.searchsorted(rebal_dates, side='right') - 1
+    window_lens = rows + 1 - prices.index.searchsorted(rebal_dates - pd.DateOffset(months=6))
+    return rebal_dates, rebal_prices.to_numpy(dtype=np.float64), rows, window_lens
+
+@njit(cache=True)
+def rebalance_step(price_row, shares, entry_price, pick_idx, pick_weights, cash, stop_loss):
+    """
+    One rebalance over positions held as arrays over the price columns
+    (0 shares = not held; shares/entry_price are updated in place): sell held
+    names that hit the stop or dropped out of the picks, then buy picks not
+    already held. NaN prices are neither valued nor traded. Sells and buys
+    fill at the same marks, so the pre-trade valuation also holds after
+    trading; returns (cash, portfolio value)
+    """
+    in_picks = np.zeros(len(shares), dtype=np.bool_)
+    in_picks[pick_idx] = True
+    portfolio_value = cash
+    for j in range(len(shares)):
+        price = price_row[j]
+        if shares[j] == 0 or np.isnan(price):
+            continue
+        portfolio_value += shares[j] * price
+        pct_change = ((price - entry_price[j]) / entry_price[j]) * 100
+        if pct_change <= stop_loss or not in_picks[j]:
+            cash += shares[j] * price
+            shares[j] = 0
+
+    for k in range(len(pick_idx)):
+        j = pick_idx[k]
+        if shares[j] == 0:
+            price = price_row[j]
+            shares_to_buy = int(portfolio_value * pick_weights[k] / price)
+            if shares_to_buy > 0:
+                cost = shares_to_buy * price
+                if cost <= cash:
+                    shares[j] = shares_to_buy
+                    entry_price[j] = price
+                    cash -= cost
+    return cash, portfolio_value
+
+# (run_config, shared args) for sweep workers; set once per worker process
+_SWEEP = None
+
+def _init_sweep_worker(run_config, shared):
+    global _SWEEP
+    _SWEEP = (run_config, shared)
+
+def _run_sweep_config(config):
+    run_config, shared = _SWEEP
+    return run_config(config, *shared)
+
+def run_sweep(run_config, configs, *shared):
+    """
+    Yield run_config(config, *shared) for each config, in grid order, as results arrive
+    Configs are independent, so they run in a process pool; the shared
+    arguments (prices, panels) go to each worker once instead of per config.
+    The pool shuts down once the generator is exhausted, so iterate it to the
+    end (put it first in a zip with the configs)
+    """
+    workers = min(os.cpu_count() or 1, len(configs))
+    with mp.Pool(workers, initializer=_init_sweep_worker,
+                 initargs=(run_config, shared)) as pool:
+        yield from pool.imap(_run_sweep_config, configs)
+        # Every result is in; let the workers exit and release their copies
+        pool.close()
+        pool.join()
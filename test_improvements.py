@@ -4,176 +4,99 @@ Test Strategy Improvements - Find the optimal configuration
 Tests combinations not yet explored in previous backtests
 """
 
+import hashlib
+import numpy as np
 import pandas as pd
-import yfinance as yf
 from datetime import datetime
+from pathlib import Path
+
+from strategy_core import (
+    compute_panels, compute_scores, download_history, rebalance_schedule,
+    rebalance_step, run_sweep, top_n_indices,
+)
 
 try:
-    from nifty500_universe import NIFTY500_TICKERS
-    PROBLEMATIC = {
-        'CEAT.NS', 'PVR.NS', 'EQUITAS.NS', 'MINDTREE.NS', 'DRREDDYS.NS',
-        'INOXLEISUR.NS', 'JSW.NS', 'ALEMBICPH.NS', 'AARTI.NS', 'ZOMATO.NS',
-        'UJJIVAN.NS', 'DCB.NS', 'CARTRADETECH.NS', 'CADILAHC.NS', 'L&TFH.NS',
-        'VARUN.NS', 'ABBOTINDIA.NS', 'PHOENIXLTD.NS', 'TATAMOTORS.NS', 'NAVABREXIM.NS',
-        'NARAYANA.NS', 'PRISMCEM.NS', 'WELSPUNIND.NS', 'RAMSINFO.NS', 'ZENSAR.NS',
-        'INFOSYS.NS', 'IIFLWAM.NS', 'TATACHEMICALS.NS', 'TATACOFFEE.NS', 'BATA.NS',
-        'ADITYADK.NS', 'COX&KINGS.NS', 'HBLPOWER.NS', 'TECHNICALA.NS', 'AMARAJABAT.NS',
-        'BHARAT FORGE.NS', 'SONA.NS', 'SAMVARDHNA.NS', 'HINDWARE.NS', 'SWANENERGY.NS',
-        'ADANITRANS.NS', 'ORIENTGREEN.NS', 'WEBSOL.NS', 'BOROSIL.NS', 'ORIENTALCARB.NS',
-        'GATI.NS', 'AEGISCHEM.NS', 'VRL.NS', 'SIYARAM.NS', 'KPR.NS',
-        'FINOLEX.NS', 'RELAXOHOME.NS', 'KALPATPOWR.NS', 'CENTURYTEXT.NS', 'APTECH.NS',
-        'NIITTECH.NS', 'FIRSTSOURCE.NS', 'HEXAWARE.NS', 'BALRAMPUR.NS', 'DHAMPUR.NS',
-        'FINOLEXIND.NS', 'INDIHOTEL.NS', 'PEL.NS', 'ENGINEERSIN.NS', 'TV18BRDCST.NS', 'INFOE.NS'
-    }
-    TICKERS = [t for t in NIFTY500_TICKERS if t not in PROBLEMATIC]
-except:
+    from nifty500_universe import FILTERED_UNIVERSE as TICKERS
+except ImportError:
     TICKERS = []
 
-def chunked(iterable, n):
-    for i in range(0, len(iterable), n):
-        yield iterable[i:i+n]
+CACHE_DIR = Path("cache")  # downloaded price panels, keyed by universe and period
 
 def fetch_history(tickers, start_date, end_date):
-    frames = []
-    for batch in chunked(tickers, 50):
-        try:
-            data = yf.download(batch, start=start_date, end=end_date, interval="1d", 
-                             auto_adjust=True, progress=False, group_by="ticker")
-            if data.empty:
-                continue
-            if isinstance(data.columns, pd.MultiIndex):
-                prices = data.xs("Close", axis=1, level=1, drop_level=True)
-            else:
-                prices = data[["Close"]]
-                prices.columns = batch[:1]
-            frames.append(prices)
-        except:
-            continue
-    
-    if not frames:
-        return pd.DataFrame()
-    
-    combined = pd.concat(frames, axis=1).sort_index()
-    combined = combined.loc[:, ~combined.columns.duplicated()]
-    combined = combined.dropna(axis=1, thresh=int(0.8 * len(combined)))
-    return combined
-
-def compute_scores(window, momentum_weights):
-    w1m, w3m, w6m = momentum_weights
-    ret1m = window.pct_change(21, fill_method=None).iloc[-1] * 100
-    ret3m = window.pct_change(63, fill_method=None).iloc[-1] * 100
-    ret6m = window.pct_change(126, fill_method=None).iloc[-1] * 100
-    vol = window.pct_change(fill_method=None).rolling(63).std().iloc[-1] * (252**0.5) * 100
-    
-    scores = w1m * ret1m + w3m * ret3m + w6m * ret6m
-    
-    result = pd.DataFrame({
-        'score': scores,
-        'ret1m': ret1m,
-        'ret3m': ret3m,
-        'ret6m': ret6m,
-        'vol': vol
-    })
-    return result.dropna()
+    # Reruns over the same universe and period read the saved panel instead of
+    # downloading it again; only tickers that failed last time are re-fetched
+    key = hashlib.md5(f"{','.join(sorted(tickers))}|{start_date}|{end_date}".encode()).hexdigest()[:16]
+    path = CACHE_DIR / f"prices-{key}.pkl"
+    prices, failed = pd.DataFrame(), list(tickers)
+    if path.exists():
+        cached = pd.read_pickle(path)
+        # Panels saved before the failed list was kept were only written when complete
+        prices, failed = cached if isinstance(cached, tuple) else (cached, [])
+        if not failed:
+            return prices
+    
+    fetched, failed = download_history(failed, start_date, end_date)
+    if failed:
+        print(f"Failed to load {len(failed)} tickers: {failed[:10]}")
+    if not fetched.empty:
+        # Ranking only needs float32 precision; halves the bytes the panels and the cache hold
+        fetched = fetched.astype(np.float32)
+        prices = fetched if prices.empty else pd.concat([prices, fetched], axis=1).sort_index()
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        pd.to_pickle((prices, failed), path)
+    return prices
 
 def run_backtest(prices, start_date, end_date, top_n, vol_cap, stop_loss, 
-                momentum_weights, rebal_freq='W-FRI', dynamic_sizing=False):
-    portfolio = {}
+                momentum_weights, rebal_freq='W-FRI', dynamic_sizing=False, panels=None):
+    # panels from compute_panels(prices) can be shared across configurations
+    if panels is None:
+        panels = compute_panels(prices)
+    rebal_dates, rebal_px, rows, window_lens = rebalance_schedule(prices, rebal_freq)
+    shares = np.zeros(prices.shape[1])
+    entry_price = np.zeros(prices.shape[1])
     cash = 100000.0
-    equity_curve = []
+    equity = np.full(len(rebal_dates), np.nan)
     
-    for date in prices.resample(rebal_freq).last().dropna(how='all').index:
-        current_prices = prices.resample(rebal_freq).last().loc[date]
-        valid_prices = current_prices.dropna()
+    for i, (row, window_len) in enumerate(zip(rows, window_lens)):
+        cols = np.flatnonzero(~np.isnan(rebal_px[i]))
         
-        if len(valid_prices) < 10:
+        if len(cols) < 10:
             continue
         
-        window_start = date - pd.DateOffset(months=6)
-        window = prices.loc[window_start:date, valid_prices.index]
-        
-        if len(window) < 126:
+        if window_len < 126:
             continue
         
-        scores = compute_scores(window, momentum_weights)
-        mask = (scores['vol'] < vol_cap) & (scores['ret3m'] > 0) & (scores['ret6m'] > 0)
-        filtered = scores[mask].sort_values('score', ascending=False)
+        scores = compute_scores(panels, row, cols, momentum_weights, vol_cap, window_len > 126)
+        eligible = np.flatnonzero(~np.isnan(scores))
         
-        if len(filtered) == 0:
+        if len(eligible) == 0:
             continue
         
-        picks = filtered.head(top_n)
-        
-        portfolio_value = cash
-        to_sell = []
-        
-        for ticker, entry_data in list(portfolio.items()):
-            if ticker not in valid_prices.index:
-                continue
-            current_price = valid_prices[ticker]
-            entry_price = entry_data['entry_price']
-            shares = entry_data['shares']
-            
-            position_value = shares * current_price
-            portfolio_value += position_value
-            
-            pct_change = ((current_price - entry_price) / entry_price) * 100
-            if pct_change <= stop_loss:
-                to_sell.append(ticker)
-            elif ticker not in picks.index:
-                to_sell.append(ticker)
-        
-        for ticker in to_sell:
-            shares = portfolio[ticker]['shares']
-            sell_price = valid_prices[ticker]
-            cash += shares * sell_price
-            del portfolio[ticker]
-        
-        portfolio_value = cash
-        for ticker in portfolio:
-            if ticker in valid_prices.index:
-                portfolio_value += portfolio[ticker]['shares'] * valid_prices[ticker]
+        top = eligible[top_n_indices(scores[eligible], top_n)]
         
         if dynamic_sizing:
-            total_score = picks['score'].sum()
-            target_weights = picks['score'] / total_score
+            target_weights = (scores[top] / scores[top].sum()).astype(np.float64)
         else:
-            target_weights = pd.Series(1.0 / len(picks), index=picks.index)
-        
-        for ticker in picks.index:
-            if ticker not in portfolio:
-                target_value = portfolio_value * target_weights[ticker]
-                current_price = valid_prices[ticker]
-                shares_to_buy = int(target_value / current_price)
-                
-                if shares_to_buy > 0:
-                    cost = shares_to_buy * current_price
-                    if cost <= cash:
-                        portfolio[ticker] = {
-                            'shares': shares_to_buy,
-                            'entry_price': current_price
-                        }
-                        cash -= cost
-        
-        total_value = cash
-        for ticker in portfolio:
-            if ticker in valid_prices.index:
-                total_value += portfolio[ticker]['shares'] * valid_prices[ticker]
+            target_weights = np.full(len(top), 1.0 / len(top))
         
-        equity_curve.append({'date': date, 'value': total_value})
+        cash, portfolio_value = rebalance_step(
+            rebal_px[i], shares, entry_price, cols[top],
+            target_weights, cash, stop_loss
+        )
+        equity[i] = portfolio_value
     
-    if len(equity_curve) < 2:
+    df_equity = pd.DataFrame({'value': equity}, index=rebal_dates).dropna()
+    if len(df_equity) < 2:
         return None
     
-    df_equity = pd.DataFrame(equity_curve).set_index('date')
     returns = df_equity['value'].pct_change().dropna()
     
     total_return = (df_equity['value'].iloc[-1] / df_equity['value'].iloc[0]) - 1
     years = (df_equity.index[-1] - df_equity.index[0]).days / 365.25
     cagr = ((1 + total_return) ** (1 / years) - 1) * 100
     
-    cumulative = (1 + returns).cumprod()
-    running_max = cumulative.expanding().max()
+    cumulative = (1 + returns.to_numpy()).cumprod()
+    running_max = np.maximum.accumulate(cumulative)
     drawdown = (cumulative - running_max) / running_max
     max_dd = drawdown.min() * 100
     
@@ -202,6 +125,13 @@ CONFIGS = [
     {'name': 'Top6_SL10_Dynamic', 'top': 6, 'vol': 40, 'sl': -10.0, 'mom': (0.3, 0.4, 0.3), 'dyn': True},
 ]
 
+def _run_config(config, prices, start_date, end_date, panels):
+    return run_backtest(
+        prices, start_date, end_date,
+        config['top'], config['vol'], config['sl'],
+        config['mom'], dynamic_sizing=config['dyn'], panels=panels
+    )
+
 if __name__ == '__main__':
     START_DATE = '2016-01-01'
     END_DATE = '2026-01-02'
@@ -221,17 +151,16 @@ if __name__ == '__main__':
     print(f"\nRunning backtest from {START_DATE} to {END_DATE}...")
     print(f"Testing {len(CONFIGS)} configurations...\n")
     
+    # Only weights, sizing and risk limits differ between configs; score panels
+    # are computed once and the configs run in parallel on them
+    panels = compute_panels(prices)
     results = []
     
-    for config in CONFIGS:
+    outcomes = run_sweep(_run_config, CONFIGS, prices, START_DATE, END_DATE, panels)
+    
+    for result, config in zip(outcomes, CONFIGS):
         print(f"Testing {config['name']}...", end=' ')
         
-        result = run_backtest(
-            prices, START_DATE, END_DATE,
-            config['top'], config['vol'], config['sl'],
-            config['mom'], dynamic_sizing=config['dyn']
-        )
-        
         if result:
             results.append({
                 'Name': config['name'],